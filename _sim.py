@@ -0,0 +1,102 @@
+"""Правила изменения показаний датчиков кофемашины.
+
+Функции используются датчиками и нагревателем в main.py, а также для
+быстрой симуляции большого числа приготовлений. Если установлен numba,
+симуляция компилируется в машинный код (@njit), а пакетная симуляция
+выполняется параллельно (prange); без него те же функции выполняются
+как обычный Python.
+"""
+
+try:
+    import numpy as np
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:  # numba (и требуемый им numpy) не обязателен
+    HAVE_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+def consume(value: float, amount: float) -> float:
+    """Расход ресурса: уровень не опускается ниже 0"""
+    return max(0, value - amount)
+
+
+def fill(value: float, amount: float) -> float:
+    """Заполнение контейнера: уровень не поднимается выше 100"""
+    return min(100, value + amount)
+
+
+def heat_step(current: float, target: float) -> float:
+    """Один шаг нагрева: +10°C, но не выше целевой температуры"""
+    if current < target:
+        return min(current + 10, target)
+    return current
+
+
+# Копии правил для вызова из скомпилированного кода. Датчики вызывают
+# исходные функции: для одиночного вызова из Python накладные расходы
+# вызова скомпилированной функции больше, чем сама арифметика.
+_consume = njit(cache=True)(consume)
+_fill = njit(cache=True)(fill)
+
+
+@njit(cache=True)
+def brews_until_empty(water: float, beans: float, waste: float,
+                      water_per_brew: float, beans_per_brew: float,
+                      water_min: float, beans_min: float, waste_max: float) -> int:
+    """Число напитков, которое можно приготовить до нехватки ресурсов.
+
+    Пороги передаются из датчиков (см. Controller.estimate_brews в main.py).
+    Хотя бы один из расходов на напиток должен быть положительным,
+    иначе ресурсы никогда не закончатся.
+    """
+    if water_per_brew <= 0 and beans_per_brew <= 0:
+        raise ValueError("Расход воды или зёрен на напиток должен быть положительным")
+    count = 0
+    while water >= water_min and beans >= beans_min and waste < waste_max:
+        beans = _consume(beans, beans_per_brew)
+        waste = _fill(waste, beans_per_brew)
+        water = _consume(water, water_per_brew)
+        count += 1
+    return count
+
+
+def _check_amounts(water_per_brew: float, beans_per_brew: float) -> None:
+    # Проверка до входа в параллельный цикл
+    if water_per_brew <= 0 and beans_per_brew <= 0:
+        raise ValueError("Расход воды или зёрен на напиток должен быть положительным")
+
+
+if HAVE_NUMBA:
+    @njit(cache=True, parallel=True)
+    def _simulate_batch(machines, water_per_brew, beans_per_brew,
+                        water_min, beans_min, waste_max):
+        n = machines.shape[0]
+        result = np.empty(n, dtype=np.int64)
+        for i in prange(n):
+            result[i] = brews_until_empty(machines[i, 0], machines[i, 1], machines[i, 2],
+                                          water_per_brew, beans_per_brew,
+                                          water_min, beans_min, waste_max)
+        return result
+    
+    def simulate_brews(machines, water_per_brew: float, beans_per_brew: float,
+                       water_min: float, beans_min: float, waste_max: float) -> list[int]:
+        """Пакетная симуляция: machines — массив (n, 3) строк (вода, зёрна, отходы)"""
+        _check_amounts(water_per_brew, beans_per_brew)
+        batch = np.asarray(machines, dtype=np.float64).reshape(-1, 3)
+        return _simulate_batch(batch, float(water_per_brew), float(beans_per_brew),
+                               float(water_min), float(beans_min), float(waste_max)).tolist()
+else:
+    def simulate_brews(machines, water_per_brew: float, beans_per_brew: float,
+                       water_min: float, beans_min: float, waste_max: float) -> list[int]:
+        """Пакетная симуляция: machines — последовательность (вода, зёрна, отходы)"""
+        _check_amounts(water_per_brew, beans_per_brew)
+        return [
+            brews_until_empty(water, beans, waste, water_per_brew, beans_per_brew,
+                              water_min, beans_min, waste_max)
+            for water, beans, waste in machines
+        ]
@@ -1,9 +1,52 @@
+import os
+import sys
 import time
-import threading
+import asyncio
+import inspect
+import functools
 from enum import Enum
-from typing import Callable, Optional, List
+from typing import Any, Callable, Optional, List
 from dataclasses import dataclass
 
+from _sim import consume, fill, heat_step, brews_until_empty
+
+
+# Отображаемые названия значений перечислений
+_DRINK_NAMES: dict[int, str] = {
+    0: "Не выбран",
+    1: "Эспрессо",
+    2: "Американо",
+    3: "Капучино",
+    4: "Латте",
+    5: "Горячая вода"
+}
+
+_STATE_NAMES: dict[int, str] = {
+    0: "Выключена",
+    1: "Прогрев",
+    2: "Готова",
+    3: "Занята",
+    4: "Ошибка"
+}
+
+_SUBSTATE_NAMES: dict[int, str] = {
+    1: "Ожидание чашки",
+    2: "Помол",
+    3: "Нагрев",
+    4: "Пролив",
+    5: "Взбивание молока",
+    6: "Готово"
+}
+
+# Полосы прогресса для 0..100% с шагом 10%
+_BARS = tuple("█" * i + "░" * (10 - i) for i in range(11))
+
+# Разделители для консольного вывода
+_EQ60 = "=" * 60
+_DASH60 = "-" * 60
+_EQ40 = "=" * 40
+_DASH40 = "-" * 40
+
 
 class DrinkType(Enum):
     """Типы напитков"""
@@ -15,15 +58,7 @@ class DrinkType(Enum):
     HOT_WATER = 5
     
     def __str__(self):
-        names = {
-            0: "Не выбран",
-            1: "Эспрессо",
-            2: "Американо",
-            3: "Капучино",
-            4: "Латте",
-            5: "Горячая вода"
-        }
-        return names.get(self.value, "Неизвестно")
+        return _DRINK_NAMES.get(self.value, "Неизвестно")
 
 
 class MachineState(Enum):
@@ -35,14 +70,7 @@ class MachineState(Enum):
     ERROR = 4
     
     def __str__(self):
-        names = {
-            0: "Выключена",
-            1: "Прогрев",
-            2: "Готова",
-            3: "Занята",
-            4: "Ошибка"
-        }
-        return names.get(self.value, "Неизвестно")
+        return _STATE_NAMES.get(self.value, "Неизвестно")
 
 
 class BusySubState(Enum):
@@ -55,15 +83,7 @@ class BusySubState(Enum):
     DONE = 6
     
     def __str__(self):
-        names = {
-            1: "Ожидание чашки",
-            2: "Помол",
-            3: "Нагрев",
-            4: "Пролив",
-            5: "Взбивание молока",
-            6: "Готово"
-        }
-        return names.get(self.value, "")
+        return _SUBSTATE_NAMES.get(self.value, "")
 
 
 class ActuatorState(Enum):
@@ -94,17 +114,29 @@ class EventType(Enum):
 class Sensor:
     """Базовый класс датчика"""
     
+    __slots__ = ('sensor_type', 'name', 'threshold', '_value', '_on_change')
+    
     def __init__(self, sensor_type: SensorType, name: str, threshold: float = 0):
         self.sensor_type = sensor_type
         self.name = name
         self.threshold = threshold
         self._value: float = 0
+        self._on_change: Optional[Callable] = None
+    
+    def set_on_change(self, callback: Callable) -> None:
+        """Обработчик, вызываемый при каждом изменении показаний"""
+        self._on_change = callback
+    
+    def _changed(self) -> None:
+        if self._on_change:
+            self._on_change()
     
     def get_value(self) -> float:
         return self._value
     
     def set_value(self, value: float) -> None:
         self._value = value
+        self._changed()
     
     def is_threshold_exceeded(self) -> bool:
         return self._value >= self.threshold
@@ -116,6 +148,8 @@ class Sensor:
 class WaterLevelSensor(Sensor):
     """Датчик уровня воды (0-100%)"""
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__(SensorType.WATER_LEVEL, "Датчик воды", threshold=20)
         self._value = 100  # Полный резервуар
@@ -124,12 +158,15 @@ class WaterLevelSensor(Sensor):
         return self._value >= self.threshold
     
     def consume(self, amount: float) -> None:
-        self._value = max(0, self._value - amount)
+        self._value = consume(self._value, amount)
+        self._changed()
 
 
 class BeansSensor(Sensor):
     """Датчик наличия зёрен (0-100%)"""
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__(SensorType.BEANS, "Датчик зёрен", threshold=10)
         self._value = 100
@@ -138,12 +175,15 @@ class BeansSensor(Sensor):
         return self._value >= self.threshold
     
     def consume(self, amount: float) -> None:
-        self._value = max(0, self._value - amount)
+        self._value = consume(self._value, amount)
+        self._changed()
 
 
 class WasteSensor(Sensor):
     """Датчик заполнения контейнера отходов (0-100%)"""
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__(SensorType.WASTE, "Датчик отходов", threshold=90)
         self._value = 0
@@ -152,15 +192,19 @@ class WasteSensor(Sensor):
         return self._value >= self.threshold
     
     def add_waste(self, amount: float) -> None:
-        self._value = min(100, self._value + amount)
+        self._value = fill(self._value, amount)
+        self._changed()
     
     def empty(self) -> None:
         self._value = 0
+        self._changed()
 
 
 class TemperatureSensor(Sensor):
     """Датчик температуры воды"""
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__(SensorType.TEMPERATURE, "Датчик температуры", threshold=90)
         self._value = 25  # Комнатная температура
@@ -175,23 +219,39 @@ class TemperatureSensor(Sensor):
 class CupSensor(Sensor):
     """Датчик наличия чашки"""
     
+    __slots__ = ('_cup_event',)
+    
     def __init__(self):
         super().__init__(SensorType.CUP, "Датчик чашки")
         self._value = 0  # 0 = нет чашки, 1 = есть
+        self._cup_event = asyncio.Event()
+    
+    def set_value(self, value: float) -> None:
+        super().set_value(value)
+        if self.has_cup():
+            self._cup_event.set()
+        else:
+            self._cup_event.clear()
     
     def has_cup(self) -> bool:
         return self._value == 1
     
     def place_cup(self) -> None:
-        self._value = 1
+        self.set_value(1)
     
     def remove_cup(self) -> None:
-        self._value = 0
+        self.set_value(0)
+    
+    async def wait_for_cup(self) -> None:
+        """Ожидание установки чашки"""
+        await self._cup_event.wait()
 
 
 class Actuator:
     """Базовый класс исполнительного устройства"""
     
+    __slots__ = ('name', 'state')
+    
     def __init__(self, name: str):
         self.name = name
         self.state = ActuatorState.OFF
@@ -203,6 +263,8 @@ class Actuator:
         return False
     
     def turn_off(self) -> None:
+        if self.state == ActuatorState.OFF:
+            return
         if self.state != ActuatorState.ERROR:
             self.state = ActuatorState.OFF
     
@@ -219,6 +281,8 @@ class Actuator:
 class Grinder(Actuator):
     """Кофемолка"""
     
+    __slots__ = ('grind_time',)
+    
     def __init__(self):
         super().__init__("Кофемолка")
         self.grind_time = 7  # секунд
@@ -235,6 +299,8 @@ class Grinder(Actuator):
 class Pump(Actuator):
     """Помпа для подачи воды"""
     
+    __slots__ = ('pressure',)
+    
     def __init__(self):
         super().__init__("Помпа")
         self.pressure = 9  # бар
@@ -253,6 +319,8 @@ class Pump(Actuator):
 class Heater(Actuator):
     """Нагревательный элемент"""
     
+    __slots__ = ('temp_sensor', 'target_temp')
+    
     def __init__(self, temp_sensor: TemperatureSensor):
         super().__init__("Нагреватель")
         self.temp_sensor = temp_sensor
@@ -262,9 +330,7 @@ class Heater(Actuator):
         """Нагрев воды"""
         self.turn_on()
         # Симуляция нагрева
-        current = self.temp_sensor.get_value()
-        if current < self.target_temp:
-            self.temp_sensor.set_value(min(current + 10, self.target_temp))
+        self.temp_sensor.set_value(heat_step(self.temp_sensor.get_value(), self.target_temp))
     
     def is_ready(self) -> bool:
         return self.temp_sensor.is_ready()
@@ -273,6 +339,8 @@ class Heater(Actuator):
 class Frother(Actuator):
     """Капучинатор (вспениватель молока)"""
     
+    __slots__ = ('froth_time',)
+    
     def __init__(self):
         super().__init__("Капучинатор")
         self.froth_time = 15  # секунд
@@ -286,24 +354,33 @@ class Frother(Actuator):
 
 
 class Display:
-    """Дисплей кофемашины"""
+    """Дисплей кофемашины. Вывод накапливается в буфере до вызова flush()."""
+    
+    __slots__ = ('current_message', 'progress', '_buf')
     
     def __init__(self):
         self.current_message = ""
         self.progress = 0
+        self._buf: List[str] = []
     
     def show_message(self, message: str) -> None:
         self.current_message = message
-        print(f"[ДИСПЛЕЙ] {message}")
+        self._buf.append(f"[ДИСПЛЕЙ] {message}\n")
     
     def show_progress(self, percent: int) -> None:
         self.progress = percent
-        bar = "█" * (percent // 10) + "░" * (10 - percent // 10)
-        print(f"[ДИСПЛЕЙ] Прогресс: [{bar}] {percent}%")
+        bar = _BARS[percent // 10]
+        self._buf.append(f"[ДИСПЛЕЙ] Прогресс: [{bar}] {percent}%\n")
     
     def show_error(self, error: str) -> None:
         self.current_message = f"ОШИБКА: {error}"
-        print(f"[ДИСПЛЕЙ] ОШИБКА: {error}")
+        self._buf.append(f"[ДИСПЛЕЙ] ОШИБКА: {error}\n")
+    
+    def flush(self) -> None:
+        """Вывод накопленных сообщений одной записью"""
+        if self._buf:
+            sys.stdout.write("".join(self._buf))
+            self._buf.clear()
     
     def show_state(self, state: MachineState, drink: DrinkType = DrinkType.NONE) -> None:
         if state == MachineState.READY:
@@ -320,24 +397,34 @@ class Display:
     def clear(self) -> None:
         self.current_message = ""
         self.progress = 0
+        self._buf.clear()
 
 
 class Button:
     """Базовый класс кнопки"""
     
+    __slots__ = ('name', 'is_lit', 'is_pressed', '_callback', '_dispatch_target')
+    
     def __init__(self, name: str):
         self.name = name
         self.is_lit = False
         self.is_pressed = False
         self._callback: Optional[Callable] = None
+        self._dispatch_target: Optional[Callable[['Button'], None]] = None
     
     def set_callback(self, callback: Callable) -> None:
         self._callback = callback
     
+    def set_dispatch_target(self, target: Callable[['Button'], None]) -> None:
+        """Общий обработчик, получающий нажатую кнопку аргументом"""
+        self._dispatch_target = target
+    
     def press(self) -> None:
         self.is_pressed = True
         print(f"[КНОПКА] Нажата: {self.name}")
-        if self._callback:
+        if self._dispatch_target:
+            self._dispatch_target(self)
+        elif self._callback:
             self._callback()
     
     def release(self) -> None:
@@ -355,6 +442,8 @@ class Button:
 class DrinkButton(Button):
     """Кнопка выбора напитка"""
     
+    __slots__ = ('drink_type',)
+    
     def __init__(self, drink_type: DrinkType):
         super().__init__(str(drink_type))
         self.drink_type = drink_type
@@ -363,6 +452,8 @@ class DrinkButton(Button):
 class PowerButton(Button):
     """Кнопка питания"""
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__("Питание")
 
@@ -370,6 +461,8 @@ class PowerButton(Button):
 class CancelButton(Button):
     """Кнопка отмены"""
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__("Отмена")
 
@@ -377,37 +470,74 @@ class CancelButton(Button):
 class Timer:
     """Таймер для отслеживания времени операций"""
     
+    __slots__ = ('duration', 'remaining', 'is_running', '_callback', '_task', '_deadline',
+                 '_callback_task')
+    
     def __init__(self):
         self.duration = 0
         self.remaining = 0
         self.is_running = False
         self._callback: Optional[Callable] = None
-        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._deadline = 0.0  # Момент истечения по time.monotonic()
+        self._callback_task: Optional[asyncio.Task] = None
     
-    def start(self, duration: float, callback: Optional[Callable] = None) -> None:
+    async def start(self, duration: float, callback: Optional[Callable] = None) -> None:
+        """Запуск таймера. Завершается по истечении времени или по stop()."""
         self.duration = duration
         self.remaining = duration
         self.is_running = True
         self._callback = callback
+        self._deadline = time.monotonic() + duration
         print(f"[ТАЙМЕР] Запущен на {duration} сек")
+        
+        self._task = asyncio.create_task(asyncio.sleep(duration))
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            if self.is_running:  # Отмена извне, а не через stop()
+                raise
+            return
+        finally:
+            self._task = None
+        
+        if not self.is_running:
+            return  # Уже истёк при вызове tick()
+        result = self._expire()
+        if inspect.isawaitable(result):
+            await result
     
-    def tick(self, elapsed: float = 1) -> bool:
-        """Обновление таймера. Возвращает True если истёк."""
+    def tick(self) -> bool:
+        """Обновление таймера. Возвращает True если истёк.
+        
+        Асинхронный callback запускается задачей, поэтому при таком callback
+        tick() вызывается внутри работающего цикла событий.
+        """
         if not self.is_running:
             return False
         
-        self.remaining -= elapsed
-        if self.remaining <= 0:
-            self.remaining = 0
-            self.is_running = False
-            print(f"[ТАЙМЕР] Истёк!")
-            if self._callback:
-                self._callback()
+        now = time.monotonic()
+        if now >= self._deadline:
+            result = self._expire()
+            if inspect.isawaitable(result):
+                self._callback_task = asyncio.get_running_loop().create_task(result)
             return True
+        self.remaining = self._deadline - now
         return False
     
+    def _expire(self):
+        """Истечение таймера. Возвращает результат callback."""
+        self.remaining = 0
+        self.is_running = False
+        print(f"[ТАЙМЕР] Истёк!")
+        if self._callback:
+            return self._callback()
+        return None
+    
     def stop(self) -> None:
         self.is_running = False
+        if self._task:
+            self._task.cancel()
         print(f"[ТАЙМЕР] Остановлен")
     
     def reset(self) -> None:
@@ -424,32 +554,68 @@ class Timer:
 class ServiceCenter:
     """Сервисная служба для обработки аварий"""
     
+    __slots__ = ('alerts',)
+    
     def __init__(self):
-        self.alerts: List[str] = []
+        # (время получения, текст); форматирование откладывается до get_alerts
+        self.alerts: List[tuple[float, str]] = []
     
     def receive_alert(self, error: str) -> None:
-        timestamp = time.strftime("%H:%M:%S")
-        alert = f"[{timestamp}] {error}"
-        self.alerts.append(alert)
+        self.alerts.append((time.time(), error))
         print(f"[СЕРВИС] Получено оповещение: {error}")
     
     def get_alerts(self) -> List[str]:
-        return self.alerts.copy()
+        return [
+            f"[{time.strftime('%H:%M:%S', time.localtime(t))}] {error}"
+            for t, error in self.alerts
+        ]
     
     def clear_alerts(self) -> None:
         self.alerts.clear()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Event:
-    """Событие системы"""
+    """Событие системы (неизменяемое, может быть ключом множества)"""
     event_type: EventType
-    data: any = None
+    data: Any = None
+
+
+@dataclass(frozen=True, slots=True)
+class MachineStatus:
+    """Снимок статуса кофемашины"""
+    state: str
+    sub_state: Optional[str]
+    selected_drink: str
+    progress: int
+    water_level: float
+    beans_level: float
+    waste_level: float
+    temperature: float
+    cup_present: bool
 
 
 class Controller:
     """Контроллер кофемашины - центральный компонент системы"""
     
+    # Алгоритм приготовления для каждого напитка
+    # Расход (вода %, зёрна %) на одну порцию; отходы растут на расход зёрен
+    _CONSUMPTION = {
+        DrinkType.HOT_WATER: (15, 0),
+        DrinkType.ESPRESSO: (30, 5),
+        DrinkType.AMERICANO: (60, 5),
+        DrinkType.CAPPUCCINO: (60, 5),
+        DrinkType.LATTE: (60, 5),
+    }
+    
+    _BREW_DISPATCH = {
+        DrinkType.HOT_WATER: "_brew_hot_water",
+        DrinkType.ESPRESSO: "_brew_espresso_based",
+        DrinkType.AMERICANO: "_brew_espresso_based",
+        DrinkType.CAPPUCCINO: "_brew_milk_based",
+        DrinkType.LATTE: "_brew_milk_based",
+    }
+    
     def __init__(self):
         # Инициализация датчиков
         self.water_sensor = WaterLevelSensor()
@@ -487,10 +653,21 @@ class Controller:
         self.progress = 0
         
         # Очередь событий
-        self.event_queue: List[Event] = []
+        self.event_queue: asyncio.Queue[Event] = asyncio.Queue()
+        # Ожидающие обработки события выбора напитка (для подавления дребезга)
+        self._seen_events: set[Event] = set()
+        
+        # Результат check_resources; сбрасывается при изменении датчиков ресурсов
+        self._resources_status: Optional[tuple[bool, str]] = None
+        for sensor in (self.water_sensor, self.beans_sensor, self.waste_sensor):
+            sensor.set_on_change(self._invalidate_resources)
         
-        # Флаг отмены
+        # Флаг отмены и задача текущего приготовления
         self.cancelled = False
+        self._brew_task: Optional[asyncio.Task] = None
+        
+        # Номер цикла включения; увеличивается при каждом выключении
+        self._power_generation = 0
         
         # Настройка callbacks кнопок
         self._setup_buttons()
@@ -499,72 +676,120 @@ class Controller:
         """Настройка обработчиков кнопок"""
         self.power_button.set_callback(self._on_power_pressed)
         self.cancel_button.set_callback(self._on_cancel_pressed)
-        for drink, button in self.drink_buttons.items():
-            button.set_callback(lambda d=drink: self._on_drink_selected(d))
+        for button in self.drink_buttons.values():
+            button.set_dispatch_target(self._on_drink_button_pressed)
     
     def _on_power_pressed(self) -> None:
         """Обработка нажатия кнопки питания"""
-        if self.state == MachineState.OFF:
-            self.power_on()
-        else:
-            self.power_off()
+        self.event_queue.put_nowait(Event(EventType.BUTTON_PRESSED, self.power_button))
     
     def _on_cancel_pressed(self) -> None:
         """Обработка нажатия кнопки отмены"""
         if self.state == MachineState.BUSY:
             self.cancelled = True
             self.display.show_message("Отменено пользователем")
+            self.display.flush()
+            if self._brew_task:
+                self._brew_task.cancel()
+    
+    def _on_drink_button_pressed(self, button: DrinkButton) -> None:
+        """Обработка нажатия любой кнопки напитка"""
+        self._on_drink_selected(button.drink_type)
     
     def _on_drink_selected(self, drink: DrinkType) -> None:
         """Обработка выбора напитка"""
         if self.state == MachineState.READY:
+            event = Event(EventType.BUTTON_PRESSED, drink)
+            if event in self._seen_events:
+                return  # Повторное нажатие (дребезг), событие уже в очереди
+            self._seen_events.add(event)
             self.selected_drink = drink
             self.drink_buttons[drink].light_on()
-            self.event_queue.append(Event(EventType.BUTTON_PRESSED, drink))
+            self.event_queue.put_nowait(event)
+    
+    # Диспетчер событий
+    
+    async def process_events(self) -> None:
+        """Бесконечный цикл обработки очереди событий"""
+        while True:
+            event = await self.event_queue.get()
+            try:
+                await self._dispatch(event)
+            finally:
+                self.event_queue.task_done()
+    
+    async def _dispatch(self, event: Event) -> None:
+        """Обработка одного события"""
+        if event.event_type != EventType.BUTTON_PRESSED:
+            return
+        
+        if event.data is self.power_button:
+            if self.state == MachineState.OFF:
+                await self.power_on()
+            else:
+                self.power_off()
+        elif isinstance(event.data, DrinkType):
+            self._seen_events.clear()
+            self.selected_drink = event.data
+            await self.brew()
     
     # Операции управления питанием
     
-    def power_on(self) -> bool:
+    async def power_on(self) -> bool:
         """Включение кофемашины"""
         if self.state != MachineState.OFF:
             return False
         
-        print("\n" + "="*60)
+        print("\n" + _EQ60)
         print("          ВКЛЮЧЕНИЕ КОФЕМАШИНЫ")
-        print("="*60)
+        print(_EQ60)
         
         self.state = MachineState.WARMING
         self.display.show_state(self.state)
+        self.display.flush()
         
         # Прогрев
-        self._warm_up()
+        await self._warm_up()
         
         return True
     
-    def _warm_up(self) -> None:
+    async def _warm_up(self) -> None:
         """Прогрев кофемашины"""
         print("\n[СИСТЕМА] Начинаю прогрев...")
         
-        steps = 7
-        for i in range(steps):
-            if self.cancelled:
-                break
-            self.heater.heat()
-            self.display.show_progress((i + 1) * 100 // steps)
-            time.sleep(0.3)  # Симуляция времени
+        # Нагреватель доводит воду до целевой температуры за время прогрева,
+        # поэтому конечное состояние задаётся сразу после ожидания
+        generation = self._power_generation
+        self.heater.turn_on()
+        await asyncio.sleep(2.1)  # Симуляция времени
+        if self.state != MachineState.WARMING or self._power_generation != generation:
+            return  # Выключена (и, возможно, снова включена) во время прогрева
+        
+        if self.temp_sensor.get_value() < self.heater.target_temp:
+            self.temp_sensor.set_value(self.heater.target_temp)
+        self.display.show_progress(100)
         
         if self.temp_sensor.is_ready():
             self.state = MachineState.READY
             self.display.show_state(self.state)
+            self.display.flush()
             print("[СИСТЕМА] Кофемашина готова к работе!")
         else:
             self._handle_error("Не удалось достичь рабочей температуры")
     
     def power_off(self) -> None:
         """Выключение кофемашины"""
-        print("\n" + "="*60)
+        print("\n" + _EQ60)
         print("          ВЫКЛЮЧЕНИЕ КОФЕМАШИНЫ")
-        print("="*60)
+        print(_EQ60)
+        
+        # Прогрев, начатый до выключения, не должен завершить следующий
+        self._power_generation += 1
+        
+        # Прерываем текущее приготовление
+        if self._brew_task:
+            self.cancelled = True
+            self._brew_task.cancel()
         
         # Выключаем все устройства
         self.grinder.turn_off()
@@ -579,12 +804,21 @@ class Controller:
         self.state = MachineState.OFF
         self.selected_drink = DrinkType.NONE
         self.display.show_state(self.state)
+        self.display.flush()
         self.temp_sensor.set_value(25)  # Остывание
     
     # Проверки ресурсов
     
     def check_resources(self) -> tuple[bool, str]:
-        """Проверка наличия ресурсов"""
+        """Проверка наличия ресурсов (результат кэшируется до изменения датчиков)"""
+        if self._resources_status is None:
+            self._resources_status = self._check_resources()
+        return self._resources_status
+    
+    def _invalidate_resources(self) -> None:
+        self._resources_status = None
+    
+    def _check_resources(self) -> tuple[bool, str]:
         if not self.water_sensor.is_enough_water():
             return False, "Недостаточно воды"
         if not self.beans_sensor.has_beans():
@@ -593,6 +827,20 @@ class Controller:
             return False, "Контейнер отходов полон"
         return True, "OK"
     
+    def estimate_brews(self, drink: DrinkType) -> int:
+        """Сколько порций напитка можно приготовить при текущих ресурсах"""
+        water_amount, beans_amount = self._CONSUMPTION[drink]
+        return brews_until_empty(
+            self.water_sensor.get_value(),
+            self.beans_sensor.get_value(),
+            self.waste_sensor.get_value(),
+            water_amount,
+            beans_amount,
+            self.water_sensor.threshold,
+            self.beans_sensor.threshold,
+            self.waste_sensor.threshold,
+        )
+    
     def check_cup(self) -> bool:
         """Проверка наличия чашки"""
         return self.cup_sensor.has_cup()
@@ -603,19 +851,21 @@ class Controller:
         """Выбор напитка для приготовления"""
         if self.state != MachineState.READY:
             self.display.show_error("Машина не готова")
+            self.display.flush()
             return False
         
         self.selected_drink = drink
         self.drink_buttons[drink].light_on()
         return True
     
-    def brew(self) -> bool:
+    async def brew(self) -> bool:
         """Приготовление выбранного напитка"""
         if self.state != MachineState.READY:
             return False
         
         if self.selected_drink == DrinkType.NONE:
             self.display.show_error("Выберите напиток")
+            self.display.flush()
             return False
         
         # Проверка ресурсов
@@ -624,65 +874,75 @@ class Controller:
             self._handle_error(msg)
             return False
         
-        print("\n" + "-"*60)
+        print("\n" + _DASH60)
         print(f"  Приготовление: {self.selected_drink}")
-        print("-"*60)
+        print(_DASH60)
         
         self.state = MachineState.BUSY
         self.cancelled = False
         self.progress = 0
         
         # Выбор алгоритма приготовления
-        if self.selected_drink == DrinkType.HOT_WATER:
-            success = self._brew_hot_water()
-        elif self.selected_drink in [DrinkType.ESPRESSO, DrinkType.AMERICANO]:
-            success = self._brew_espresso_based()
-        else:  # Капучино, Латте
-            success = self._brew_milk_based()
-        
-        # Завершение
-        self._finish_brewing(success)
+        brewing = getattr(self, self._BREW_DISPATCH[self.selected_drink])()
+        
+        # Приготовление в отдельной задаче, которую отменяет кнопка «Отмена»
+        self._brew_task = asyncio.create_task(brewing)
+        success = False
+        try:
+            success = await self._brew_task
+        except asyncio.CancelledError:
+            if not self.cancelled:
+                raise
+        finally:
+            self._brew_task = None
+            # Завершение
+            self._finish_brewing(success)
         return success
     
-    def _brew_hot_water(self) -> bool:
+    async def _brew_hot_water(self) -> bool:
         """Приготовление горячей воды"""
         # Проверка чашки
-        if not self._wait_for_cup():
+        if not await self._wait_for_cup():
             return False
         
         # Пролив
         self._update_progress(BusySubState.BREWING, 50)
         self.pump.turn_on()
-        time.sleep(0.5)
+        await asyncio.sleep(0.5)
         self.pump.turn_off()
-        self.water_sensor.consume(15)
+        water_amount, _ = self._CONSUMPTION[self.selected_drink]
+        self.water_sensor.consume(water_amount)
         
         self._update_progress(BusySubState.DONE, 100)
         return True
     
-    def _brew_espresso_based(self) -> bool:
+    async def _brew_espresso_based(self) -> bool:
         """Приготовление эспрессо или американо"""
         # Проверка чашки
-        if not self._wait_for_cup():
+        if not await self._wait_for_cup():
             return False
         
         # Помол
         self._update_progress(BusySubState.GRINDING, 20)
         self.grinder.turn_on()
-        time.sleep(0.5)
+        await asyncio.sleep(0.5)
         self.grinder.turn_off()
-        self.beans_sensor.consume(5)
-        self.waste_sensor.add_waste(5)
+        water_amount, beans_amount = self._CONSUMPTION[self.selected_drink]
+        self.beans_sensor.consume(beans_amount)
+        self.waste_sensor.add_waste(beans_amount)
         
         if self.cancelled:
             return False
         
         # Проверка температуры
-        if not self.temp_sensor.is_ready():
+        temp_ready = self.temp_sensor.is_ready
+        if not temp_ready():
             self._update_progress(BusySubState.HEATING, 40)
-            while not self.temp_sensor.is_ready() and not self.cancelled:
-                self.heater.heat()
-                time.sleep(0.2)
+            heat = self.heater.heat
+            sleep = asyncio.sleep
+            while not temp_ready() and not self.cancelled:
+                heat()
+                await sleep(0.2)
         
         if self.cancelled:
             return False
@@ -690,19 +950,18 @@ class Controller:
         # Пролив
         self._update_progress(BusySubState.BREWING, 70)
         self.pump.turn_on()
-        time.sleep(0.5)
+        await asyncio.sleep(0.5)
         self.pump.turn_off()
         
-        water_amount = 30 if self.selected_drink == DrinkType.ESPRESSO else 60
         self.water_sensor.consume(water_amount)
         
         self._update_progress(BusySubState.DONE, 100)
         return True
     
-    def _brew_milk_based(self) -> bool:
+    async def _brew_milk_based(self) -> bool:
         """Приготовление напитка с молоком (капучино, латте)"""
         # Сначала эспрессо
-        if not self._brew_espresso_based():
+        if not await self._brew_espresso_based():
             return False
         
         if self.cancelled:
@@ -711,35 +970,36 @@ class Controller:
         # Взбивание молока
         self._update_progress(BusySubState.FROTHING, 85)
         self.frother.turn_on()
-        time.sleep(0.5)
+        await asyncio.sleep(0.5)
         self.frother.turn_off()
         
         self._update_progress(BusySubState.DONE, 100)
         return True
     
-    def _wait_for_cup(self) -> bool:
-        """Ожидание установки чашки"""
+    async def _wait_for_cup(self) -> bool:
+        """Ожидание установки чашки (отмена прерывает ожидание)"""
         self._update_progress(BusySubState.WAITING_CUP, 5)
         
         if self.check_cup():
             return True
         
         self.display.show_message("Установите чашку")
+        self.display.flush()
         
         # Ожидание с таймаутом
         timeout = 10  # секунд
-        elapsed = 0
-        while elapsed < timeout:
-            if self.cancelled:
-                return False
-            if self.check_cup():
-                self.display.show_message("Чашка установлена")
-                return True
-            time.sleep(0.5)
-            elapsed += 0.5
-        
-        self.display.show_error("Таймаут ожидания чашки")
-        return False
+        try:
+            await asyncio.wait_for(self.cup_sensor.wait_for_cup(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.display.show_error("Таймаут ожидания чашки")
+            return False
+        
+        if not self.check_cup():
+            self.display.show_error("Чашка не обнаружена")
+            return False
+        
+        self.display.show_message("Чашка установлена")
+        return True
     
     def _update_progress(self, sub_state: BusySubState, percent: int) -> None:
         """Обновление прогресса"""
@@ -747,9 +1007,12 @@ class Controller:
         self.progress = percent
         self.display.show_message(f"{sub_state}")
         self.display.show_progress(percent)
+        self.display.flush()
     
     def _finish_brewing(self, success: bool) -> None:
         """Завершение приготовления"""
+        self.display.flush()
+        
         # Выключаем все устройства
         self.grinder.turn_off()
         self.pump.turn_off()
@@ -760,15 +1023,17 @@ class Controller:
             self.drink_buttons[self.selected_drink].light_off()
         
         if success and not self.cancelled:
-            print("\n" + "="*60)
+            print("\n" + _EQ60)
             print(f"  {self.selected_drink} ГОТОВ!")
-            print("="*60 + "\n")
+            print(_EQ60 + "\n")
             self.display.show_message(f"{self.selected_drink} готов! Приятного аппетита!")
+            self.display.flush()
         elif self.cancelled:
             print("\n[СИСТЕМА] Приготовление отменено")
         
-        # Возврат в состояние Ready
-        self.state = MachineState.READY
+        # Возврат в состояние Ready (если машину не выключили)
+        if self.state == MachineState.BUSY:
+            self.state = MachineState.READY
         self.selected_drink = DrinkType.NONE
         self.sub_state = None
         self.progress = 0
@@ -778,6 +1043,7 @@ class Controller:
         """Обработка ошибки"""
         self.state = MachineState.ERROR
         self.display.show_error(error)
+        self.display.flush()
         self.service.receive_alert(error)
         
         # Выключаем все устройства
@@ -791,82 +1057,76 @@ class Controller:
         if self.state == MachineState.ERROR:
             self.state = MachineState.READY
             self.display.show_state(self.state)
+            self.display.flush()
     
     # ---- Получение состояния ----
     
     def get_state(self) -> MachineState:
         return self.state
     
-    def get_status(self) -> dict:
+    def get_status(self) -> MachineStatus:
         """Получение полного статуса машины"""
-        return {
-            "state": str(self.state),
-            "sub_state": str(self.sub_state) if self.sub_state else None,
-            "selected_drink": str(self.selected_drink),
-            "progress": self.progress,
-            "water_level": self.water_sensor.get_value(),
-            "beans_level": self.beans_sensor.get_value(),
-            "waste_level": self.waste_sensor.get_value(),
-            "temperature": self.temp_sensor.get_value(),
-            "cup_present": self.cup_sensor.has_cup(),
-        }
+        return MachineStatus(
+            state=str(self.state),
+            sub_state=str(self.sub_state) if self.sub_state else None,
+            selected_drink=str(self.selected_drink),
+            progress=self.progress,
+            water_level=self.water_sensor.get_value(),
+            beans_level=self.beans_sensor.get_value(),
+            waste_level=self.waste_sensor.get_value(),
+            temperature=self.temp_sensor.get_value(),
+            cup_present=self.cup_sensor.has_cup(),
+        )
     
     def print_status(self) -> None:
         """Вывод статуса машины"""
         status = self.get_status()
-        print("\n" + "="*40)
+        print("\n" + _EQ40)
         print("       СТАТУС КОФЕМАШИНЫ")
-        print("="*40)
-        print(f"  Состояние:     {status['state']}")
-        if status['sub_state']:
-            print(f"  Подсостояние:  {status['sub_state']}")
-        print(f"  Напиток:       {status['selected_drink']}")
-        print(f"  Прогресс:      {status['progress']}%")
-        print("-"*40)
-        print(f"  Вода:       {status['water_level']:.0f}%")
-        print(f"  Зёрна:      {status['beans_level']:.0f}%")
-        print(f"  Отходы:     {status['waste_level']:.0f}%")
-        print(f"  Температура: {status['temperature']:.0f}°C")
-        print(f"  Чашка:      {'Есть' if status['cup_present'] else 'Нет'}")
-        print("="*40 + "\n")
+        print(_EQ40)
+        print(f"  Состояние:     {status.state}")
+        if status.sub_state:
+            print(f"  Подсостояние:  {status.sub_state}")
+        print(f"  Напиток:       {status.selected_drink}")
+        print(f"  Прогресс:      {status.progress}%")
+        print(_DASH40)
+        print(f"  Вода:       {status.water_level:.0f}%")
+        print(f"  Зёрна:      {status.beans_level:.0f}%")
+        print(f"  Отходы:     {status.waste_level:.0f}%")
+        print(f"  Температура: {status.temperature:.0f}°C")
+        print(f"  Чашка:      {'Есть' if status.cup_present else 'Нет'}")
+        print(_EQ40 + "\n")
 
 
 class CoffeeMachine:
+    # Напитки, для которых создаются методы make_<напиток>
+    DRINKS = (
+        DrinkType.ESPRESSO,
+        DrinkType.AMERICANO,
+        DrinkType.CAPPUCCINO,
+        DrinkType.LATTE,
+        DrinkType.HOT_WATER,
+    )
+    
     def __init__(self):
         self.controller = Controller()
+        
+        # make_espresso, make_americano, make_cappuccino, make_latte, make_hot_water
+        for drink in self.DRINKS:
+            setattr(self, f"make_{drink.name.lower()}", functools.partial(self._make, drink))
     
-    def power_on(self) -> None:
+    async def power_on(self) -> None:
         """Включить кофемашину"""
-        self.controller.power_on()
+        await self.controller.power_on()
     
     def power_off(self) -> None:
         """Выключить кофемашину"""
         self.controller.power_off()
     
-    def make_espresso(self) -> bool:
-        """Приготовить эспрессо"""
-        self.controller.select_drink(DrinkType.ESPRESSO)
-        return self.controller.brew()
-    
-    def make_americano(self) -> bool:
-        """Приготовить американо"""
-        self.controller.select_drink(DrinkType.AMERICANO)
-        return self.controller.brew()
-    
-    def make_cappuccino(self) -> bool:
-        """Приготовить капучино"""
-        self.controller.select_drink(DrinkType.CAPPUCCINO)
-        return self.controller.brew()
-    
-    def make_latte(self) -> bool:
-        """Приготовить латте"""
-        self.controller.select_drink(DrinkType.LATTE)
-        return self.controller.brew()
-    
-    def make_hot_water(self) -> bool:
-        """Налить горячую воду"""
-        self.controller.select_drink(DrinkType.HOT_WATER)
-        return self.controller.brew()
+    async def _make(self, drink: DrinkType) -> bool:
+        """Приготовить напиток"""
+        self.controller.select_drink(drink)
+        return await self.controller.brew()
     
     def place_cup(self) -> None:
         """Установить чашку"""
@@ -902,12 +1162,12 @@ class CoffeeMachine:
         self.controller.cancel_button.press()
 
 
-def demo():
+async def demo():
     """Демонстрация работы системы кофемашины"""
     
-    print("\n" + "="*60)
+    print("\n" + _EQ60)
     print("    ДЕМОНСТРАЦИЯ СРВ «КОФЕМАШИНА»")
-    print("="*60)
+    print(_EQ60)
     
     # Создание кофемашины
     machine = CoffeeMachine()
@@ -918,7 +1178,7 @@ def demo():
     
     # Включаем машину
     print("\n2. Включение кофемашины:")
-    machine.power_on()
+    await machine.power_on()
     
     # Показываем статус после прогрева
     print("\n3. Статус после прогрева:")
@@ -930,7 +1190,7 @@ def demo():
     
     # Готовим эспрессо
     print("\n5. Приготовление эспрессо:")
-    machine.make_espresso()
+    await machine.make_espresso()
     
     # Убираем чашку и ставим новую
     print("\n6. Меняем чашку:")
@@ -939,7 +1199,7 @@ def demo():
     
     # Готовим капучино
     print("\n7. Приготовление капучино:")
-    machine.make_cappuccino()
+    await machine.make_cappuccino()
     
     # Финальный статус
     print("\n8. Финальный статус:")
@@ -949,30 +1209,69 @@ def demo():
     print("\n9. Выключение:")
     machine.power_off()
     
-    print("\n" + "="*60)
+    print("\n" + _EQ60)
     print("    ДЕМОНСТРАЦИЯ ЗАВЕРШЕНА")
-    print("="*60 + "\n")
+    print(_EQ60 + "\n")
+
 
+def _open_stdin() -> Optional[asyncio.StreamReader]:
+    """Чтение stdin средствами цикла событий (POSIX: каналы и терминалы).
+    
+    Возвращает None, если stdin нельзя отслеживать (Windows, ввод из
+    файла) — тогда строки читаются через input() в пуле потоков, и на
+    Windows выход по Ctrl-C дожидается ввода строки.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    fd = sys.stdin.fileno()
+    
+    def on_readable() -> None:
+        data = os.read(fd, 4096)
+        if data:
+            reader.feed_data(data)
+        else:
+            loop.remove_reader(fd)
+            reader.feed_eof()
+    
+    try:
+        loop.add_reader(fd, on_readable)
+    except (NotImplementedError, OSError):
+        return None
+    return reader
+
+
+async def _read_line(reader: Optional[asyncio.StreamReader], prompt: str) -> str:
+    """Чтение строки команды. В конце ввода выбрасывает EOFError."""
+    if reader is None:
+        return await asyncio.get_running_loop().run_in_executor(None, input, prompt)
+    print(prompt, end="", flush=True)
+    line = await reader.readline()
+    if not line:
+        raise EOFError
+    return line.decode(sys.stdin.encoding or "utf-8", errors="replace")
 
-def interactive_demo():
+
+async def interactive_demo():
     """Интерактивная демонстрация"""
     
-    print("\n" + "="*60)
+    print("\n" + _EQ60)
     print("    ИНТЕРАКТИВНЫЙ РЕЖИМ СРВ «КОФЕМАШИНА»")
-    print("="*60)
+    print(_EQ60)
     
     machine = CoffeeMachine()
+    # Без потока чтения: при Ctrl-C asyncio.run не ждёт ввода строки
+    reader = _open_stdin()
     
     commands = {
         "1": ("Включить", machine.power_on),
         "2": ("Выключить", machine.power_off),
         "3": ("Поставить чашку", machine.place_cup),
         "4": ("Убрать чашку", machine.remove_cup),
-        "5": ("Эспрессо", machine.make_espresso),
-        "6": ("Американо", machine.make_americano),
-        "7": ("Капучино", machine.make_cappuccino),
-        "8": ("Латте", machine.make_latte),
-        "9": ("Горячая вода", machine.make_hot_water),
+        **{
+            str(i + 5): (str(drink), getattr(machine, f"make_{drink.name.lower()}"))
+            for i, drink in enumerate(CoffeeMachine.DRINKS)
+        },
+        "c": ("Отмена", machine.cancel),
         "s": ("Статус", machine.status),
         "w": ("Долить воду", machine.refill_water),
         "b": ("Добавить зёрна", machine.refill_beans),
@@ -984,28 +1283,57 @@ def interactive_demo():
     for key, (name, _) in commands.items():
         print(f"  {key} - {name}")
     
-    while True:
-        try:
-            cmd = input("\nВведите команду: ").strip().lower()
+    # Таблица команд, индексируемая кодом символа (все команды — один ASCII-символ)
+    dispatch: List[Optional[tuple[str, Optional[Callable]]]] = [None] * 128
+    for key, entry in commands.items():
+        dispatch[ord(key)] = entry
+    
+    # Диспетчер событий кнопок и фоновые операции (прогрев, приготовление)
+    # выполняются в том же цикле событий, пока ожидается ввод команды
+    dispatcher = asyncio.create_task(machine.controller.process_events())
+    tasks: set[asyncio.Task] = set()
+    
+    try:
+        while True:
+            try:
+                line = await _read_line(reader, "\nВведите команду: ")
+            except EOFError:
+                # Ввод из сценария закончился — даём операциям завершиться
+                if tasks:
+                    await asyncio.wait(tasks)
+                break
+            cmd = line.strip().lower()
             
             if cmd == "q":
+                if tasks:
+                    print(f"Отмена незавершённых операций: {len(tasks)}")
                 print("До свидания!")
                 break
             
-            if cmd in commands:
-                name, func = commands[cmd]
+            entry = dispatch[ord(cmd)] if len(cmd) == 1 and ord(cmd) < 128 else None
+            if entry:
+                name, func = entry
                 if func:
-                    func()
+                    result = func()
+                    if inspect.isawaitable(result):
+                        task = asyncio.create_task(result)
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                        # Запуск операции до чтения следующей строки:
+                        # при вставленном вводе readline не уступает управление
+                        await asyncio.sleep(0)
             else:
                 print("Неизвестная команда")
-                
-        except KeyboardInterrupt:
-            print("\nПрервано пользователем")
-            break
-        except EOFError:
-            break
+    finally:
+        for task in (dispatcher, *tasks):
+            task.cancel()
+        if reader:
+            asyncio.get_running_loop().remove_reader(sys.stdin.fileno())
 
 
 if __name__ == "__main__":
-    # demo()
-    interactive_demo()
+    try:
+        # asyncio.run(demo())
+        asyncio.run(interactive_demo())
+    except KeyboardInterrupt:
+        print("\nПрервано пользователем")